@@ -1,26 +1,45 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from fastapi.responses import Response, StreamingResponse
+from fastapi.sse import KEEPALIVE_COMMENT, EventSourceResponse, format_sse_event
+from pydantic import BaseModel, ConfigDict, Field
+from types import MappingProxyType
+from typing import Optional, Dict, Any, AsyncIterator, List, Mapping, NamedTuple, Sequence, Tuple
 import uvicorn
+import asyncio
 import logging
-import json
-from providers import ProviderFactory
-from rag_client import get_relevant_context
+import orjson
+import os
+from providers import BaseLLMProvider, ChatCoalescer, ProviderFactory
+from rag_client import get_relevant_context, embed_query, embeddings_available, close_client
+from semantic_cache import CACHE_NON_RAG, semantic_cache
+from response_cache import response_cache, make_key
+
+# Development mode enables auto-reload (single worker), INFO logs and access logs
+DEBUG = os.getenv("DEBUG", "").lower() in ("1", "true", "yes")
 
 # Configure logging
 logging.basicConfig(
-    level=logging.INFO,
+    level=logging.INFO if DEBUG else logging.WARNING,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release pooled HTTP connections on shutdown."""
+    yield
+    await close_client()
+    await ProviderFactory.close_all()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Chatbot API",
     description="Modular chatbot API supporting multiple LLM providers (Gemini, Ollama, OpenAI, Claude)",
-    version="1.1.0"
+    version="1.1.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -33,9 +52,33 @@ app.add_middleware(
 )
 
 
+# Shared read-only stand-in for requests without parameters
+_EMPTY_PARAMS: Mapping[str, Any] = MappingProxyType({})
+
+# Shares one provider call between identical concurrent /chat requests
+chat_coalescer = ChatCoalescer()
+
+
+# Prompt template used when RAG context is available
+_PROMPT_TMPL = (
+    "Context information:\n"
+    "{context}\n\n"
+    "User question: {message}\n\n"
+    "Answer the question based on the context above. "
+    "If the context doesn't help answer the question, use your general knowledge."
+)
+
+
+def _build_prompt(context: str, message: str) -> str:
+    """Build the LLM prompt, injecting RAG context when there is any."""
+    return _PROMPT_TMPL.format(context=context, message=message) if context else message
+
+
 # Request/Response models
 class ChatRequest(BaseModel):
     """Chat request model."""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+    
     message: str = Field(..., description="The user's message", min_length=1)
     provider: str = Field(default="gemini", description="LLM provider to use")
     model: Optional[str] = Field(default=None, description="Model name (provider-specific)")
@@ -45,6 +88,8 @@ class ChatRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     """Chat response model."""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+    
     prompt: str = Field(..., description="The prompt that was sent to the LLM")
     response: str = Field(..., description="The LLM's response")
     provider: str = Field(..., description="Provider that was used")
@@ -53,17 +98,129 @@ class ChatResponse(BaseModel):
 
 class HealthResponse(BaseModel):
     """Health check response model."""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+    
     status: str = Field(..., description="Overall service status")
     providers: Dict[str, bool] = Field(..., description="Status of each provider")
 
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+def _json_response(model: BaseModel) -> Response:
+    """Serialize a response model to JSON in pydantic-core, skipping jsonable_encoder."""
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+class _PreparedChat(NamedTuple):
+    """A chat request resolved up to the point of calling the provider."""
+    model_name: str
+    params: Mapping[str, Any]
+    cache_key: str
+    embedding: Optional[List[float]]
+    prompt: str
+    cached_response: Optional[str]
+    # Streamed chunks of the cached response, when it was produced by a stream
+    cached_chunks: Optional[Tuple[str, ...]] = None
+
+
+def _get_provider(name: str) -> BaseLLMProvider:
+    """
+    Resolve a provider by name, rejecting unknown providers with a 400.
+
+    Called before a handler's try block (or before an event stream starts),
+    so the 400 isn't turned into a 500 or an error event.
+    """
+    try:
+        return ProviderFactory.get_provider(name)
+    except ValueError as e:
+        logger.error(f"Invalid provider or configuration: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _cache_allowed(http_request: Request) -> bool:
+    """Whether the client allows a cached answer (no Cache-Control: no-cache/no-store)."""
+    directives = http_request.headers.get("cache-control", "").lower()
+    return "no-cache" not in directives and "no-store" not in directives
+
+
+async def _prepare(
+    request: ChatRequest,
+    provider: BaseLLMProvider,
+    use_cache: bool = True
+) -> _PreparedChat:
+    """
+    Resolve model and parameters, consult the caches and build the prompt.
+
+    Args:
+        request: Chat request
+        provider: Provider resolved for the request
+        use_cache: Whether cached answers may be served
+
+    Returns:
+        _PreparedChat with cached_response set on a cache hit
+    """
+    model_name = request.model or provider.get_default_model()
+    params = request.parameters or _EMPTY_PARAMS
+    
+    # Serve exact repeats without embedding, retrieval or generation
+    cache_key = make_key(request.provider, model_name, request.use_rag, request.message, params)
+    cached = response_cache.get(cache_key) if use_cache else None
+    if cached is not None:
+        return _PreparedChat(model_name, params, cache_key, None, *cached)
+    
+    # Start RAG retrieval now so it overlaps the embedding round trip
+    context_task = (
+        asyncio.create_task(get_relevant_context(request.message, top_k=3))
+        if request.use_rag else None
+    )
+    
+    # Serve near-duplicate questions from the semantic cache. Non-RAG
+    # requests skip the embedding round trip unless configured otherwise.
+    embedding = None
+    if embeddings_available() and (request.use_rag or CACHE_NON_RAG):
+        embedding = await embed_query(request.message)
+    if use_cache and embedding is not None:
+        cached = semantic_cache.lookup(
+            embedding, request.provider, model_name, request.use_rag, params
+        )
+        if cached is not None:
+            if context_task is not None:
+                context_task.cancel()
+            response_cache.set(cache_key, *cached)
+            return _PreparedChat(model_name, params, cache_key, embedding, *cached)
+    
+    # Get relevant context from RAG if enabled
+    context = await context_task if context_task is not None else ""
+    
+    # Build the message with context if available
+    prompt = _build_prompt(context, request.message)
+    if context:
+        logger.info("Enhanced message with %d chars of context", len(context))
+    
+    return _PreparedChat(model_name, params, cache_key, embedding, prompt, None)
+
+
+def _cache_response(
+    request: ChatRequest,
+    prepared: _PreparedChat,
+    response_text: str,
+    chunks: Optional[Sequence[str]] = None
+) -> None:
+    """Store a fresh LLM response (and its streamed chunks, if any) in the exact and semantic caches."""
+    response_cache.set(prepared.cache_key, prepared.prompt, response_text, chunks)
+    if prepared.embedding is not None:
+        semantic_cache.store(
+            request.message, prepared.embedding, request.provider, prepared.model_name,
+            request.use_rag, prepared.prompt, response_text, prepared.params, chunks
+        )
+
+
+@app.post("/chat", response_model=None, responses={200: {"model": ChatResponse}})
+async def chat(request: ChatRequest, http_request: Request) -> Response:
     """
     Send a message to the chatbot and get a response.
     
     Args:
         request: Chat request with message and provider information
+        http_request: The raw request, for its Cache-Control header
         
     Returns:
         ChatResponse with the LLM's response
@@ -71,50 +228,38 @@ async def chat(request: ChatRequest):
     Raises:
         HTTPException: If provider is unavailable or request fails
     """
+    provider = _get_provider(request.provider)
     try:
-        logger.info(f"Chat request - Provider: {request.provider}, Message: {request.message[:50]}..., RAG: {request.use_rag}")
-        
-        # Get provider instance
-        provider = ProviderFactory.get_provider(request.provider)
-        
-        # Get model name
-        model_name = request.model or provider.get_default_model()
+        logger.info("Chat request - Provider: %s, Message: %.50s..., RAG: %s", request.provider, request.message, request.use_rag)
         
-        # Get additional parameters
-        params = request.parameters or {}
+        prepared = await _prepare(request, provider, _cache_allowed(http_request))
+        if prepared.cached_response is not None:
+            return _json_response(ChatResponse.model_construct(
+                prompt=prepared.prompt,
+                response=prepared.cached_response,
+                provider=request.provider,
+                model=prepared.model_name
+            ))
         
-        # Get relevant context from RAG if enabled
-        context = ""
-        if request.use_rag:
-            context = get_relevant_context(request.message, top_k=3)
-        
-        # Build the message with context if available
-        if context:
-            enhanced_message = f"""Context information:
-                {context}
-
-                User question: {request.message}
-
-                Answer the question based on the context above. If the context doesn't help answer the question, use your general knowledge."""
-            logger.info(f"Enhanced message with {len(context)} chars of context")
-        else:
-            enhanced_message = request.message
-        
-        # Send message to provider
-        response_text = await provider.chat(
-            message=enhanced_message,
-            model=model_name,
-            **params
+        # Send message to provider, sharing the call with identical in-flight requests
+        response_text = await chat_coalescer.chat(
+            request.provider,
+            provider,
+            message=prepared.prompt,
+            model=prepared.model_name,
+            **prepared.params
         )
         
-        logger.info(f"Chat response - Provider: {request.provider}, Response length: {len(response_text)}")
+        logger.info("Chat response - Provider: %s, Response length: %d", request.provider, len(response_text))
+        
+        _cache_response(request, prepared, response_text)
         
-        return ChatResponse(
-            prompt=enhanced_message,
+        return _json_response(ChatResponse.model_construct(
+            prompt=prepared.prompt,
             response=response_text,
             provider=request.provider,
-            model=model_name
-        )
+            model=prepared.model_name
+        ))
     
     except ValueError as e:
         logger.error(f"Invalid provider or configuration: {str(e)}")
@@ -125,62 +270,109 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=f"Error processing chat request: {str(e)}")
 
 
-@app.post("/chat/stream")
-async def chat_stream(request: ChatRequest):
-    """
-    Send a message and get a streaming response (SSE).
-    """
+# Seconds without an event before a keep-alive comment is sent, so proxies
+# don't drop slow generations (same interval FastAPI uses for SSE routes)
+_PING_INTERVAL = 15.0
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+async def _with_keepalive(events: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Forward SSE frames, inserting a keep-alive comment whenever the source is idle."""
+    it = events.__aiter__()
+    pending = asyncio.ensure_future(it.__anext__())
     try:
-        logger.info(f"Stream request - Provider: {request.provider}, RAG: {request.use_rag}")
+        while True:
+            done, _ = await asyncio.wait((pending,), timeout=_PING_INTERVAL)
+            if not done:
+                yield KEEPALIVE_COMMENT
+                continue
+            try:
+                frame = pending.result()
+            except StopAsyncIteration:
+                return
+            yield frame
+            pending = asyncio.ensure_future(it.__anext__())
+    finally:
+        if not pending.done():
+            pending.cancel()
+            with suppress(BaseException):
+                await pending
+        await it.aclose()
+
+
+async def _stream_events(
+    request: ChatRequest,
+    provider: BaseLLMProvider,
+    use_cache: bool
+) -> AsyncIterator[bytes]:
+    """Generate the SSE frames for a streaming chat request."""
+    chunks = []
+    try:
+        prepared = await _prepare(request, provider, use_cache)
+        
+        # provider/model are constant for the stream, so encode them once
+        # and only JSON-encode the token per event
+        suffix = (
+            ',"provider":' + orjson.dumps(request.provider).decode()
+            + ',"model":' + orjson.dumps(prepared.model_name).decode() + '}'
+        )
         
-        provider = ProviderFactory.get_provider(request.provider)
-        model_name = request.model or provider.get_default_model()
-        params = request.parameters or {}
+        # Events carry their position in the stream as the SSE id, so
+        # clients can tell a re-sent event from a repeated token
+        def token_event(token: str, seq: int) -> bytes:
+            return format_sse_event(
+                data_str='{"token":' + orjson.dumps(token).decode() + suffix,
+                id=str(seq)
+            )
         
-        # Get relevant context from RAG if enabled
-        context = ""
-        if request.use_rag:
-            context = get_relevant_context(request.message, top_k=3)
+        # Replay cached responses chunk by chunk; answers cached by /chat
+        # have no chunk boundaries and go out as a single event
+        if prepared.cached_response is not None:
+            for seq, chunk in enumerate(prepared.cached_chunks or (prepared.cached_response,)):
+                yield token_event(chunk, seq)
+            return
         
-        # Build the message with context if available
-        if context:
-            enhanced_message = f"""Context information:
-                {context}
+        async for chunk in provider.chat_stream(
+            message=prepared.prompt,
+            model=prepared.model_name,
+            **prepared.params
+        ):
+            yield token_event(chunk, len(chunks))
+            chunks.append(chunk)
+    except Exception as e:
+        logger.error(f"Stream error: {str(e)}")
+        yield format_sse_event(data_str='{"error":' + orjson.dumps(str(e)).decode() + '}')
+        return
+    
+    if chunks:
+        _cache_response(request, prepared, "".join(chunks), chunks)
 
-                User question: {request.message}
 
-                Answer the question based on the context above. If the context doesn't help answer the question, use your general knowledge."""
-            logger.info(f"Enhanced stream message with {len(context)} chars of context")
-        else:
-            enhanced_message = request.message
+@app.post(
+    "/chat/stream",
+    response_model=None,
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "Server-sent events"}}
+)
+async def chat_stream(request: ChatRequest, http_request: Request) -> EventSourceResponse:
+    """
+    Send a message and get a streaming response (SSE).
 
-        async def generate():
-            try:
-                async for chunk in provider.chat_stream(
-                    message=enhanced_message,
-                    model=model_name,
-                    **params
-                ):
-                    data = json.dumps({
-                        "token": chunk,
-                        "provider": request.provider,
-                        "model": model_name
-                    })
-                    yield f"data: {data}\n\n"
-            except Exception as e:
-                logger.error(f"Stream error: {str(e)}")
-                yield f"data: {json.dumps({'error': str(e)})}\n\n"
-
-        return StreamingResponse(generate(), media_type="text/event-stream")
-        
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    Cached answers are replayed as a stream unless the client sends
+    Cache-Control: no-cache or no-store.
+    """
+    logger.info("Stream request - Provider: %s, RAG: %s", request.provider, request.use_rag)
+    
+    # Resolved before the response starts, so an unknown provider is a 400
+    provider = _get_provider(request.provider)
+    return EventSourceResponse(
+        _with_keepalive(_stream_events(request, provider, _cache_allowed(http_request))),
+        headers=_SSE_HEADERS
+    )
 
 
-@app.get("/health", response_model=HealthResponse)
-async def health_check():
+@app.get("/health", response_model=None, responses={200: {"model": HealthResponse}})
+async def health_check() -> Response:
     """
     Check the health of the service and all providers.
     
@@ -190,21 +382,21 @@ async def health_check():
     try:
         # Check all providers
         available_providers = ProviderFactory.get_available_providers()
-        provider_status = {}
-        
-        for provider_name in available_providers:
-            is_healthy = await ProviderFactory.check_provider_health(provider_name)
-            provider_status[provider_name] = is_healthy
+        results = await asyncio.gather(*[
+            ProviderFactory.check_provider_health(provider_name)
+            for provider_name in available_providers
+        ])
+        provider_status = dict(zip(available_providers, results))
         
         # Overall status is healthy if at least one provider is available
         overall_status = "healthy" if any(provider_status.values()) else "unhealthy"
         
-        logger.info(f"Health check - Status: {overall_status}, Providers: {provider_status}")
+        logger.info("Health check - Status: %s, Providers: %s", overall_status, provider_status)
         
-        return HealthResponse(
+        return _json_response(HealthResponse.model_construct(
             status=overall_status,
             providers=provider_status
-        )
+        ))
     
     except Exception as e:
         logger.error(f"Health check error: {str(e)}")
@@ -231,6 +423,10 @@ if __name__ == "__main__":
         "chatbot:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
-        log_level="info"
+        loop="uvloop",
+        http="httptools",
+        workers=1 if DEBUG else int(os.getenv("WORKERS", os.cpu_count() or 1)),
+        reload=DEBUG,
+        log_level="info" if DEBUG else "warning",
+        access_log=DEBUG
     )
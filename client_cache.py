@@ -0,0 +1,240 @@
+"""
+Client-side response cache for the test scripts.
+
+Stores /chat responses on disk keyed by (message, use_rag, provider) so
+repeated runs can skip the server. Messages are normalized before hashing and
+the least recently used entries are evicted past MAX_ENTRIES. An optional
+semantic tier matches near-duplicate messages by embedding similarity when
+NumPy is installed and the caller supplies embeddings.
+
+Scripts can also append chat results to a shared JSON-lines file, keyed by
+message, RAG flag, provider and model, so a later run can replay a prompt
+that has already been answered by the same provider and model.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+CACHE_PATH = ".rag_test_cache.json"
+SHARED_CACHE_PATH = ".rag_shared_cache.jsonl"
+TTL_SECONDS = 3600
+MAX_ENTRIES = 128
+SIMILARITY_THRESHOLD = 0.95
+
+
+def _normalize(message: str) -> str:
+    """Lowercase a message, drop punctuation and collapse whitespace."""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", "", message.lower())).strip()
+
+
+def make_key(message: str, use_rag: bool, provider: Optional[str] = None) -> str:
+    """Build the exact-match key for a request."""
+    raw = json.dumps({"m": _normalize(message), "r": use_rag, "p": provider}, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def shared_key(message: str, use_rag: bool, provider: str, model: str) -> str:
+    """Build the key for a row in the shared cache file."""
+    raw = f"{_normalize(message)}|{int(use_rag)}|{provider}|{model}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def load_shared(path: str = SHARED_CACHE_PATH, ttl: float = TTL_SECONDS) -> Dict[str, Any]:
+    """
+    Load the shared cache file, dropping expired or malformed rows.
+
+    The file is append-only while scripts run, so it is rewritten without
+    those rows (and without rows superseded by a newer one) when it has any.
+
+    Args:
+        path: JSON-lines file backing the shared cache
+        ttl: Seconds before a row expires
+
+    Returns:
+        Dict mapping shared_key to the cached response, newest row winning
+    """
+    rows: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return {}
+
+    now = time.time()
+    total = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            total += 1
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            if now - row.get("ts", 0) <= ttl:
+                rows[row["k"]] = row
+
+    if len(rows) < total:
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(row) + "\n" for row in rows.values())
+    return {k: row["resp"] for k, row in rows.items()}
+
+
+def append_shared(
+    message: str,
+    use_rag: bool,
+    provider: str,
+    model: str,
+    response: Dict[str, Any],
+    path: str = SHARED_CACHE_PATH
+) -> None:
+    """
+    Append a response to the shared cache file.
+
+    Args:
+        message: The chat message
+        use_rag: Whether RAG was enabled
+        provider: Provider that produced the response
+        model: Model that produced the response
+        response: The response JSON to share
+        path: JSON-lines file backing the shared cache
+    """
+    row = {"k": shared_key(message, use_rag, provider, model), "resp": response, "ts": time.time()}
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(row) + "\n")
+
+
+class ClientCache:
+    """Exact + semantic LRU cache of /chat responses persisted to a JSON file."""
+
+    def __init__(
+        self,
+        path: str = CACHE_PATH,
+        ttl: float = TTL_SECONDS,
+        max_entries: int = MAX_ENTRIES
+    ):
+        """
+        Load the cache from disk, dropping expired entries.
+
+        Args:
+            path: JSON file backing the cache
+            ttl: Seconds before an entry expires
+            max_entries: Maximum number of cached responses
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Least recently used first
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = OrderedDict(json.load(f))
+            except (OSError, ValueError):
+                self.entries = OrderedDict()
+        self._evict_expired()
+
+    def _evict_expired(self) -> None:
+        """Remove entries older than the TTL."""
+        now = time.time()
+        expired = [k for k, v in self.entries.items() if now - v["ts"] > self.ttl]
+        for key in expired:
+            del self.entries[key]
+
+    def get(
+        self,
+        message: str,
+        use_rag: bool,
+        provider: Optional[str] = None,
+        embedding: Optional[List[float]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Args:
+            message: The chat message
+            use_rag: Whether RAG was enabled
+            provider: Provider name, or None for the server default
+            embedding: Optional embedding of the message for the semantic tier
+
+        Returns:
+            The cached response JSON, or None on a miss
+        """
+        self._evict_expired()
+        key = make_key(message, use_rag, provider)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry["response"]
+
+        if embedding is None or not NUMPY_AVAILABLE:
+            return None
+
+        candidates = [
+            (k, v) for k, v in self.entries.items()
+            if v.get("embedding") and v["use_rag"] == use_rag and v["provider"] == provider
+        ]
+        if not candidates:
+            return None
+
+        # Stored embeddings are already unit-norm, so one matvec gives cosines
+        matrix = np.ascontiguousarray(
+            np.stack([v["embedding"] for _, v in candidates]), dtype=np.float32
+        )
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+        query /= norm
+
+        sims = matrix @ query
+        best = int(np.argmax(sims))
+        if sims[best] < SIMILARITY_THRESHOLD:
+            return None
+        key, entry = candidates[best]
+        self.entries.move_to_end(key)
+        return entry["response"]
+
+    def put(
+        self,
+        message: str,
+        use_rag: bool,
+        provider: Optional[str],
+        response: Dict[str, Any],
+        embedding: Optional[List[float]] = None
+    ) -> None:
+        """
+        Cache a response and persist the cache to disk.
+
+        Args:
+            message: The chat message
+            use_rag: Whether RAG was enabled
+            provider: Provider name, or None for the server default
+            response: The response JSON to cache
+            embedding: Optional embedding of the message for the semantic tier
+        """
+        if embedding is not None and NUMPY_AVAILABLE:
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            embedding = (vector / norm).tolist() if norm else None
+
+        key = make_key(message, use_rag, provider)
+        self.entries[key] = {
+            "ts": time.time(),
+            "use_rag": use_rag,
+            "provider": provider,
+            "response": response,
+            "embedding": embedding,
+        }
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
@@ -1,5 +1,7 @@
-from typing import Dict, Type
+import time
+from typing import Dict, Tuple, Type
 from providers.base import BaseLLMProvider
+from providers.coalescer import ChatCoalescer
 
 # Optional providers
 _OPTIONAL_PROVIDERS = {}
@@ -38,6 +40,10 @@ class ProviderFactory:
     
     _instances: Dict[str, BaseLLMProvider] = {}
     
+    # provider name -> (checked_at, is_healthy)
+    _health_cache: Dict[str, Tuple[float, bool]] = {}
+    _health_ttl: float = 10.0
+    
     @classmethod
     def get_provider(cls, provider_name: str) -> BaseLLMProvider:
         """
@@ -89,17 +95,34 @@ class ProviderFactory:
         """
         Check if a provider is healthy and available.
         
+        Results are cached for a short TTL so frequent health probes don't
+        turn into a network call per provider per request.
+        
         Args:
             provider_name: Name of the provider
             
         Returns:
             True if provider is healthy, False otherwise
         """
+        now = time.monotonic()
+        cached = cls._health_cache.get(provider_name)
+        if cached and now - cached[0] < cls._health_ttl:
+            return cached[1]
+        
         try:
             provider = cls.get_provider(provider_name)
-            return await provider.is_available()
+            is_healthy = await provider.is_available()
         except Exception:
-            return False
+            is_healthy = False
+        
+        cls._health_cache[provider_name] = (now, is_healthy)
+        return is_healthy
+    
+    @classmethod
+    async def close_all(cls) -> None:
+        """Close every provider instance that has been created."""
+        for instance in cls._instances.values():
+            await instance.close()
 
 
-__all__ = ['ProviderFactory', 'BaseLLMProvider']
+__all__ = ['ProviderFactory', 'BaseLLMProvider', 'ChatCoalescer']
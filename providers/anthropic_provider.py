@@ -3,7 +3,8 @@ from typing import Optional
 from providers.base import BaseLLMProvider
 
 try:
-    from anthropic import AsyncAnthropic
+    import httpx
+    from anthropic import DEFAULT_CONNECTION_LIMITS, AsyncAnthropic, DefaultAsyncHttpxClient
     ANTHROPIC_AVAILABLE = True
 except ImportError:
     ANTHROPIC_AVAILABLE = False
@@ -26,6 +27,7 @@ class AnthropicProvider(BaseLLMProvider):
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
         self.default_model = default_model
         self.client = None
+        self.http_client = None
         
         if not self.api_key:
             raise ValueError("Anthropic API key is required. Set ANTHROPIC_API_KEY environment variable.")
@@ -33,9 +35,23 @@ class AnthropicProvider(BaseLLMProvider):
     def _get_client(self):
         """Get or create the Anthropic client."""
         if self.client is None:
-            self.client = AsyncAnthropic(api_key=self.api_key)
+            # Retry failed connection attempts at the transport level. The
+            # SDK's default timeout and connection limits are kept; the limits
+            # are repeated on the transport since httpx ignores `limits` when
+            # a custom transport is passed
+            self.http_client = DefaultAsyncHttpxClient(
+                transport=httpx.AsyncHTTPTransport(retries=2, limits=DEFAULT_CONNECTION_LIMITS)
+            )
+            self.client = AsyncAnthropic(api_key=self.api_key, http_client=self.http_client)
         return self.client
     
+    async def close(self) -> None:
+        """Close the pooled HTTP client."""
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+            self.client = None
+    
     async def chat(self, message: str, model: Optional[str] = None, **kwargs) -> str:
         """
         Send a message to Claude and get a response.
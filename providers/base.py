@@ -54,3 +54,11 @@ class BaseLLMProvider(ABC):
             The default model name
         """
         pass
+    
+    async def close(self) -> None:
+        """
+        Release any network resources held by the provider.
+        
+        Providers that own pooled clients override this; the default does nothing.
+        """
+        pass
@@ -0,0 +1,54 @@
+import asyncio
+import json
+from typing import Any, Dict, Optional, Tuple
+from providers.base import BaseLLMProvider
+
+
+class ChatCoalescer:
+    """
+    Coalesces identical in-flight chat requests into a single provider call.
+
+    Concurrent requests with the same provider, model, message and parameters
+    all await the first request's call instead of each paying for their own.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[str, str, str, str], asyncio.Task] = {}
+
+    async def chat(
+        self,
+        provider_name: str,
+        provider: BaseLLMProvider,
+        message: str,
+        model: Optional[str] = None,
+        **kwargs: Any
+    ) -> str:
+        """
+        Send a message through the provider, sharing the call with any
+        identical request already in flight.
+
+        Args:
+            provider_name: Name the provider is registered under
+            provider: Provider instance to call
+            message: The message to send
+            model: Model name to use
+            **kwargs: Additional provider-specific parameters
+
+        Returns:
+            The LLM's response
+        """
+        key = (
+            provider_name,
+            model or "",
+            message,
+            json.dumps(kwargs, sort_keys=True, default=str)
+        )
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(provider.chat(message=message, model=model, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # Shield so one caller disconnecting doesn't cancel the shared call
+        return await asyncio.shield(task)
@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Any, Dict, Optional
 from providers.base import BaseLLMProvider
 
 try:
@@ -26,6 +26,7 @@ class GeminiProvider(BaseLLMProvider):
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         self.default_model = default_model or os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
         self.client = None
+        self._model_cache: Dict[str, Any] = {}
         
         if not self.api_key:
             raise ValueError("Gemini API key is required. Set GEMINI_API_KEY environment variable.")
@@ -35,7 +36,11 @@ class GeminiProvider(BaseLLMProvider):
     
     def _get_client(self, model_name: str):
         """Get or create the Gemini model instance."""
-        return genai.GenerativeModel(model_name)
+        model = self._model_cache.get(model_name)
+        if model is None:
+            model = genai.GenerativeModel(model_name)
+            self._model_cache[model_name] = model
+        return model
     
     async def chat(self, message: str, model: Optional[str] = None, **kwargs) -> str:
         """
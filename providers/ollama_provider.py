@@ -64,7 +64,7 @@ class OllamaProvider(BaseLLMProvider):
             client = self._get_client()
             model_name = model or self.default_model
             
-            # Using synchronous stream=True since the official client supports it
+            # AsyncClient returns an async iterator of chunks when stream=True
             stream = await client.chat(
                 model=model_name,
                 messages=[{'role': 'user', 'content': message}],
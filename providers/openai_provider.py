@@ -3,7 +3,8 @@ from typing import Optional
 from providers.base import BaseLLMProvider
 
 try:
-    from openai import AsyncOpenAI
+    import httpx
+    from openai import DEFAULT_CONNECTION_LIMITS, AsyncOpenAI, DefaultAsyncHttpxClient
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
@@ -26,6 +27,7 @@ class OpenAIProvider(BaseLLMProvider):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.default_model = default_model
         self.client = None
+        self.http_client = None
         
         if not self.api_key:
             raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY environment variable.")
@@ -33,9 +35,23 @@ class OpenAIProvider(BaseLLMProvider):
     def _get_client(self):
         """Get or create the OpenAI client."""
         if self.client is None:
-            self.client = AsyncOpenAI(api_key=self.api_key)
+            # Retry failed connection attempts at the transport level. The
+            # SDK's default timeout and connection limits are kept; the limits
+            # are repeated on the transport since httpx ignores `limits` when
+            # a custom transport is passed
+            self.http_client = DefaultAsyncHttpxClient(
+                transport=httpx.AsyncHTTPTransport(retries=2, limits=DEFAULT_CONNECTION_LIMITS)
+            )
+            self.client = AsyncOpenAI(api_key=self.api_key, http_client=self.http_client)
         return self.client
     
+    async def close(self) -> None:
+        """Close the pooled HTTP client."""
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+            self.client = None
+    
     async def chat(self, message: str, model: Optional[str] = None, **kwargs) -> str:
         """
         Send a message to OpenAI and get a response.
@@ -4,9 +4,10 @@ RAG Client Module
 Provides functionality to retrieve relevant context from the RAG Ingestion Service
 for use in chatbot responses.
 """
-import requests
+import httpx
 import logging
-from typing import Optional
+import os
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -15,8 +16,24 @@ logger = logging.getLogger(__name__)
 # Use localhost when running chatbot directly with Python
 INGESTION_SERVICE_URL = "http://host.docker.internal:8001"
 
+# Query embeddings (for the semantic cache) need an ingestion service that
+# exposes POST /embed ({"text": ...} -> {"embedding": [...]}). That route is
+# not part of the documented API, so it is opt-in.
+EMBED_ENABLED = os.getenv("RAG_EMBED_ENABLED", "").lower() in ("1", "true", "yes")
 
-def get_relevant_context(user_query: str, top_k: int = 3) -> str:
+# Cleared once the service shows it has no /embed route
+_embed_available = EMBED_ENABLED
+_embed_failure_logged = False
+
+# Shared client so concurrent requests reuse pooled keep-alive connections
+_client = httpx.AsyncClient(
+    base_url=INGESTION_SERVICE_URL,
+    timeout=5.0,
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+)
+
+
+async def get_relevant_context(user_query: str, top_k: int = 3) -> str:
     """
     Retrieve relevant document chunks for a user query.
     
@@ -29,20 +46,19 @@ def get_relevant_context(user_query: str, top_k: int = 3) -> str:
     """
     try:
         # Search for relevant chunks
-        response = requests.post(
-            f"{INGESTION_SERVICE_URL}/search",
+        response = await _client.post(
+            "/search",
             json={
                 "query": user_query,
                 "top_k": top_k
-            },
-            timeout=5  # 5 second timeout
+            }
         )
         
         if response.status_code != 200:
             logger.warning(f"RAG service returned status {response.status_code}")
             return ""
         else:
-            logger.info(f"RAG service returned status {response.status_code}")
+            logger.info("RAG service returned status %d", response.status_code)
 
         
         data = response.json()
@@ -63,14 +79,14 @@ def get_relevant_context(user_query: str, top_k: int = 3) -> str:
             context_parts.append(f"[Source {i}: {title}]\n{text}\n")
         
         context = "\n---\n".join(context_parts)
-        logger.info(f"Retrieved {len(data['results'])} context chunks for query")
+        logger.info("Retrieved %d context chunks for query", len(data['results']))
         return context
     
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         logger.warning("RAG service request timed out")
         return ""
     
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         logger.warning("Could not connect to RAG service")
         return ""
     
@@ -79,7 +95,67 @@ def get_relevant_context(user_query: str, top_k: int = 3) -> str:
         return ""
 
 
-def check_rag_health() -> bool:
+def embeddings_available() -> bool:
+    """Whether query embeddings are enabled and the service still provides them."""
+    return _embed_available
+
+
+def _log_embed_failure(reason: str) -> None:
+    """Warn about the first embedding failure; later ones only at DEBUG."""
+    global _embed_failure_logged
+    if _embed_failure_logged:
+        logger.debug("Could not embed query with RAG service: %s", reason)
+        return
+    _embed_failure_logged = True
+    logger.warning(
+        "Could not embed query with RAG service: %s (further failures are logged at DEBUG)",
+        reason
+    )
+
+
+async def embed_query(user_query: str) -> Optional[List[float]]:
+    """
+    Embed a user query with the RAG service's embedding model.
+
+    Args:
+        user_query: The user's question
+
+    Returns:
+        The query embedding, or None if embeddings are disabled, the service
+        is unavailable or errors
+    """
+    global _embed_available
+    if not _embed_available:
+        return None
+
+    try:
+        response = await _client.post(
+            "/embed",
+            json={"text": user_query},
+            timeout=2.0
+        )
+
+        if response.status_code in (404, 405):
+            _embed_available = False
+            logger.warning("RAG service has no /embed route; semantic cache disabled")
+            return None
+
+        if response.status_code != 200:
+            _log_embed_failure(f"status {response.status_code}")
+            return None
+
+        return response.json().get('embedding') or None
+
+    except httpx.HTTPError as e:
+        _log_embed_failure(type(e).__name__)
+        return None
+
+    except Exception as e:
+        _log_embed_failure(str(e))
+        return None
+
+
+async def check_rag_health() -> bool:
     """
     Check if RAG service is available.
     
@@ -87,7 +163,12 @@ def check_rag_health() -> bool:
         True if RAG service is healthy, False otherwise
     """
     try:
-        response = requests.get(f"{INGESTION_SERVICE_URL}/health", timeout=2)
+        response = await _client.get("/health", timeout=2.0)
         return response.status_code == 200
     except:
         return False
+
+
+async def close_client() -> None:
+    """Close the shared HTTP client and its pooled connections."""
+    await _client.aclose()
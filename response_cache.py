@@ -0,0 +1,121 @@
+"""
+Response Cache Module
+
+Exact-match LRU cache of LLM responses with a TTL. Checked before the
+semantic cache so repeated questions skip embedding, RAG retrieval and the
+LLM call entirely.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+
+
+def make_key(
+    provider: str,
+    model: str,
+    use_rag: bool,
+    message: str,
+    params: Optional[Mapping[str, Any]] = None
+) -> str:
+    """
+    Build the cache key for a request.
+
+    Args:
+        provider: Provider name
+        model: Model name
+        use_rag: Whether RAG is enabled for the request
+        message: The user's message, normalized for case and whitespace
+        params: Additional provider parameters
+
+    Returns:
+        Hex digest identifying the request
+    """
+    normalized = " ".join(message.lower().split())
+    encoded_params = json.dumps(params or {}, sort_keys=True, default=str)
+    raw = "\x1f".join((provider, model, str(int(use_rag)), encoded_params, normalized))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# (prompt, response, streamed chunks or None)
+CachedResponse = Tuple[str, str, Optional[Tuple[str, ...]]]
+
+
+class ResponseCache:
+    """In-process LRU cache of responses with a TTL."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl: float = TTL_SECONDS):
+        """
+        Initialize the response cache.
+
+        Args:
+            max_entries: Maximum number of cached responses
+            ttl: Seconds before a cached response expires
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, CachedResponse]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Key built with make_key
+
+        Returns:
+            Tuple of (prompt, response, chunks) on a hit, None otherwise;
+            chunks is None unless the response was streamed
+        """
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        logger.info("Response cache hit (%d hits, %d misses)", self.hits, self.misses)
+        return entry[1]
+
+    def set(
+        self,
+        key: str,
+        prompt: str,
+        response: str,
+        chunks: Optional[Sequence[str]] = None
+    ) -> None:
+        """
+        Cache a response.
+
+        Args:
+            key: Key built with make_key
+            prompt: The prompt that was sent to the LLM
+            response: The LLM's response
+            chunks: The response's streamed chunks, so it can be replayed as a stream
+        """
+        stored = tuple(chunks) if chunks is not None else None
+        self._entries[key] = (time.monotonic(), (prompt, response, stored))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        self._entries.clear()
+
+
+# Shared cache instance used by the API
+response_cache = ResponseCache()
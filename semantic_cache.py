@@ -0,0 +1,226 @@
+"""
+Semantic Cache Module
+
+Caches LLM responses keyed by the embedding of the user's message so that
+near-paraphrases of a previously answered question can skip both RAG
+retrieval and the LLM call.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+SIMILARITY_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_SIZE", "1024"))
+TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+# Also embed requests with RAG disabled (costs an embedding round trip each)
+CACHE_NON_RAG = os.getenv("SEMANTIC_CACHE_NON_RAG", "").lower() in ("1", "true", "yes")
+
+# Rows added to a namespace's embedding matrix each time it fills up
+GROW_ROWS = 1024
+
+
+def _normalize(message: str) -> str:
+    """Normalize a message for exact-key hashing."""
+    return " ".join(message.lower().split())
+
+
+def _namespace(
+    provider: str,
+    model: str,
+    use_rag: bool,
+    params: Optional[Mapping[str, Any]] = None
+) -> str:
+    """Build the namespace that partitions cached entries."""
+    encoded_params = json.dumps(params or {}, sort_keys=True, default=str)
+    return f"{provider}|{model}|{int(use_rag)}|{encoded_params}"
+
+
+def _key(message: str, namespace: str) -> str:
+    """Build the exact-match key for a message within a namespace."""
+    return hashlib.sha256(f"{namespace}|{_normalize(message)}".encode("utf-8")).hexdigest()
+
+
+class _Bucket:
+    """Cached entries for a single provider/model/RAG combination."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        # key -> (prompt, response, streamed chunks or None, timestamp), in LRU order
+        self.entries: "OrderedDict[str, Tuple[str, str, Optional[Tuple[str, ...]], float]]" = OrderedDict()
+        # Unit-norm embeddings; rows [0, size) are in use and row i belongs
+        # to self.keys[i]. Capacity grows in GROW_ROWS chunks so inserts
+        # don't reallocate the whole matrix every time.
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self.size = 0
+        self.keys: List[str] = []
+        self.rows: Dict[str, int] = {}
+
+    def similarities(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a unit-norm query against every cached row."""
+        return self.matrix[:self.size] @ query
+
+    def add(
+        self,
+        key: str,
+        vector: np.ndarray,
+        prompt: str,
+        response: str,
+        chunks: Optional[Tuple[str, ...]]
+    ) -> None:
+        """Insert an entry, growing the embedding matrix if it is full."""
+        if self.size == self.matrix.shape[0]:
+            grown = np.zeros((self.size + GROW_ROWS, self.dim), dtype=np.float32)
+            grown[:self.size] = self.matrix[:self.size]
+            self.matrix = grown
+
+        self.matrix[self.size] = vector
+        self.keys.append(key)
+        self.rows[key] = self.size
+        self.size += 1
+        self.entries[key] = (prompt, response, chunks, time.time())
+
+    def remove(self, key: str) -> None:
+        """Drop an entry, moving the last row into its slot."""
+        self.entries.pop(key, None)
+        row = self.rows.pop(key)
+        last = self.size - 1
+        if row != last:
+            moved = self.keys[last]
+            self.matrix[row] = self.matrix[last]
+            self.keys[row] = moved
+            self.rows[moved] = row
+        self.keys.pop()
+        self.size = last
+
+
+class SemanticCache:
+    """In-process LRU cache of responses looked up by cosine similarity."""
+
+    def __init__(
+        self,
+        threshold: float = SIMILARITY_THRESHOLD,
+        max_entries: int = MAX_ENTRIES,
+        ttl: float = TTL_SECONDS
+    ):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a cache hit
+            max_entries: Maximum number of entries kept per namespace
+            ttl: Seconds before a cached entry expires
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._buckets: Dict[str, _Bucket] = {}
+
+    def lookup(
+        self,
+        embedding: List[float],
+        provider: str,
+        model: str,
+        use_rag: bool,
+        params: Optional[Mapping[str, Any]] = None
+    ) -> Optional[Tuple[str, str, Optional[Tuple[str, ...]]]]:
+        """
+        Find a cached response for a semantically similar message.
+
+        Args:
+            embedding: Embedding of the user's message
+            provider: Provider name
+            model: Model name
+            use_rag: Whether RAG was enabled for the request
+            params: Additional provider parameters
+
+        Returns:
+            Tuple of (prompt, response, chunks) on a hit, None otherwise;
+            chunks is None unless the response was streamed
+        """
+        bucket = self._buckets.get(_namespace(provider, model, use_rag, params))
+        if bucket is None or bucket.size == 0:
+            return None
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0 or query.shape[0] != bucket.dim:
+            return None
+
+        sims = bucket.similarities(query / norm)
+        row = int(np.argmax(sims))
+        if sims[row] < self.threshold:
+            return None
+
+        key = bucket.keys[row]
+        prompt, response, chunks, ts = bucket.entries[key]
+        if time.time() - ts > self.ttl:
+            bucket.remove(key)
+            return None
+
+        bucket.entries.move_to_end(key)
+        logger.info("Semantic cache hit (similarity %.3f)", sims[row])
+        return prompt, response, chunks
+
+    def store(
+        self,
+        message: str,
+        embedding: List[float],
+        provider: str,
+        model: str,
+        use_rag: bool,
+        prompt: str,
+        response: str,
+        params: Optional[Mapping[str, Any]] = None,
+        chunks: Optional[Sequence[str]] = None
+    ) -> None:
+        """
+        Cache a response for a message.
+
+        Args:
+            message: The user's original message
+            embedding: Embedding of the user's message
+            provider: Provider name
+            model: Model name
+            use_rag: Whether RAG was enabled for the request
+            prompt: The prompt that was sent to the LLM
+            response: The LLM's response
+            params: Additional provider parameters
+            chunks: The response's streamed chunks, so it can be replayed as a stream
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return
+        vector = vector / norm
+
+        namespace = _namespace(provider, model, use_rag, params)
+        bucket = self._buckets.get(namespace)
+        if bucket is None or bucket.dim != vector.shape[0]:
+            # New namespace, or the embedding model changed: start over
+            bucket = self._buckets[namespace] = _Bucket(vector.shape[0])
+
+        key = _key(message, namespace)
+        if key in bucket.entries:
+            bucket.remove(key)
+        bucket.add(key, vector, prompt, response, tuple(chunks) if chunks is not None else None)
+
+        while len(bucket.entries) > self.max_entries:
+            oldest = next(iter(bucket.entries))
+            bucket.remove(oldest)
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        self._buckets.clear()
+
+
+# Shared cache instance used by the API
+semantic_cache = SemanticCache()
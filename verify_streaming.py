@@ -1,7 +1,8 @@
 import asyncio
-import aiohttp
-import json
+import httpx
+import orjson
 import time
+from httpx_sse import aconnect_sse
 
 async def verify_streaming():
     url = "http://localhost:8000/chat/stream"
@@ -12,57 +13,63 @@ async def verify_streaming():
     }
 
     print(f"Connecting to {url}...")
-    start_time = time.time()
-    first_chunk_time = None
-    chunks = []
+    # Integer nanosecond timestamps from the monotonic clock; converted to
+    # seconds only for the summary
+    start_ns = time.perf_counter_ns()
+    first_chunk_ns = None
+    # Running timing stats, so long streams don't keep every timestamp
+    first_token_ns = None
+    last_token_ns = 0
+    token_count = 0
     
-    async with aiohttp.ClientSession() as session:
+    async with httpx.AsyncClient(timeout=None) as client:
         try:
-            async with session.post(url, json=payload) as response:
-                print(f"Status: {response.status}")
-                if response.status != 200:
-                    text = await response.text()
-                    print(f"Error response: {text}")
+            async with aconnect_sse(client, "POST", url, json=payload) as event_source:
+                response = event_source.response
+                print(f"Status: {response.status_code}")
+                if response.status_code != 200:
+                    await response.aread()
+                    print(f"Error response: {response.text}")
                     return
 
-                async for line in response.content:
-                    line = line.decode('utf-8').strip()
-                    if not line or not line.startswith("data: "):
+                async for sse in event_source.aiter_sse():
+                    now_ns = time.perf_counter_ns()
+                    if not sse.data:
                         continue
                     
-                    current_time = time.time()
-                    if first_chunk_time is None:
-                        first_chunk_time = current_time
-                        print(f"First chunk received after {first_chunk_time - start_time:.4f}s")
+                    if first_chunk_ns is None:
+                        first_chunk_ns = now_ns
+                        print(f"First chunk received after {(first_chunk_ns - start_ns) // 1_000_000}ms")
                     
-                    data_str = line[6:]  # Remove "data: "
                     try:
-                        data = json.loads(data_str)
+                        data = orjson.loads(sse.data)
                         if "token" in data:
                             token = data["token"]
-                            print(f"{current_time - start_time:.4f}s: {token}")
-                            chunks.append((current_time, token))
-                    except json.JSONDecodeError:
-                        print(f"Failed to decode: {data_str}")
+                            print(f"{(now_ns - start_ns) // 1_000_000}ms: {token}")
+                            if first_token_ns is None:
+                                first_token_ns = now_ns
+                            last_token_ns = now_ns
+                            token_count += 1
+                    except (orjson.JSONDecodeError, ValueError):
+                        print(f"Failed to decode: {sse.data}")
 
         except Exception as e:
             print(f"Connection error: {e}")
             return
 
-    if not chunks:
+    if token_count == 0:
         print("No chunks received.")
         return
 
     # Analyze timing
-    times = [c[0] for c in chunks]
-    if len(times) > 1:
-        total_duration = times[-1] - times[0]
-        avg_gap = total_duration / (len(times) - 1)
-        print(f"\nTotal tokens: {len(chunks)}")
+    if token_count > 1:
+        total_duration = (last_token_ns - first_token_ns) / 1e9
+        avg_gap = total_duration / (token_count - 1)
+        print(f"\nTotal tokens: {token_count}")
         print(f"Stream duration (first to last): {total_duration:.4f}s")
         print(f"Average time between tokens: {avg_gap:.4f}s")
         
-        if total_duration < 0.1 and len(chunks) > 5:
+        if total_duration < 0.1 and token_count > 5:
             print("\nWARNING: Tokens arrived very quickly. It might still be buffered!")
         else:
             print("\nSUCCESS: Tokens arrived sequentially over time.")
@@ -70,9 +77,9 @@ async def verify_streaming():
         print("Only received one chunk.")
 
 if __name__ == "__main__":
-    # Check if aiohttp is installed
+    # Check if httpx-sse is installed
     try:
-        import aiohttp
+        import httpx_sse
         asyncio.run(verify_streaming())
     except ImportError:
-        print("aiohttp not installed to run this script. Please install it or rely on manual verification methods.")
+        print("httpx-sse not installed to run this script. Please install it or rely on manual verification methods.")